@@ -6,9 +6,9 @@ import json
 import sys
 from datetime import datetime
 from pdf_processor import extract_text_and_elements_from_pdf
-from text_chunker import chunk_text, simple_sent_tokenize
+from text_chunker import chunk_text, simple_sent_tokenize, ChunkStore
 from secure_qa import answer_question
-from visualization import extract_tables_and_visualize, extract_charts_and_visualize
+from visualization import extract_tables_and_visualize, extract_charts_and_visualize, prefetch_insights
 from navigation import generate_navigation_suggestions
 from utils import get_file_hash
 from encryption import encrypt_data, decrypt_data, secure_file_path, encrypt_file, decrypt_file
@@ -20,13 +20,17 @@ if len(sys.argv) > 1 and sys.argv[1] == "healthz":
     sys.exit(0)
 
 # Use our custom sentence tokenizer instead of NLTK's
-# This prevents NLTK from trying to load punkt_tab resource
-try:
-    import nltk.tokenize
-    nltk.tokenize.sent_tokenize = simple_sent_tokenize
-except ImportError:
-    # NLTK not available, which is fine since we use our custom tokenizer
-    pass
+# This prevents NLTK from trying to load punkt_tab resource.
+# Only patch when NLTK is already loaded — importing it here just for the
+# patch would pay NLTK's full import cost on every app cold start, and
+# nothing in this codebase uses NLTK's tokenizer directly.
+if "nltk" in sys.modules:
+    try:
+        import nltk.tokenize
+        nltk.tokenize.sent_tokenize = simple_sent_tokenize
+    except ImportError:
+        # NLTK not available, which is fine since we use our custom tokenizer
+        pass
 
 st.set_page_config(
     page_title="Secure Assignment Evaluator",
@@ -112,12 +116,17 @@ def save_assignment_data():
     serializable_tables = convert_dataframes_to_dict(copy.deepcopy(st.session_state.tables))
     serializable_charts = convert_dataframes_to_dict(copy.deepcopy(st.session_state.charts))
     
+    # Chunks are stored as a ChunkStore; serialize as plain chunk dicts
+    pdf_chunks = st.session_state.pdf_chunks
+    if isinstance(pdf_chunks, ChunkStore):
+        pdf_chunks = pdf_chunks.to_records()
+
     # Create assignment data with serializable components
     assignment_data = {
         'id': st.session_state.assignment_id,
         'timestamp': datetime.now().isoformat(),
         'pdf_text': st.session_state.pdf_text,
-        'pdf_chunks': st.session_state.pdf_chunks,
+        'pdf_chunks': pdf_chunks,
         'tables': serializable_tables,
         'charts': serializable_charts,
         'file_hash': st.session_state.file_hash
@@ -182,7 +191,7 @@ def load_assignment_data(assignment_id):
         
         # Load data into session state
         st.session_state.pdf_text = assignment_data['pdf_text']
-        st.session_state.pdf_chunks = assignment_data['pdf_chunks']
+        st.session_state.pdf_chunks = ChunkStore.from_records(assignment_data['pdf_chunks'])
         
         # Recursively convert dictionaries to DataFrames where needed
         tables = assignment_data['tables']
@@ -407,7 +416,14 @@ def evaluation_interface():
     
     with tab2:
         st.header("Data Visualization")
-        
+
+        # Warm every table/chart insight cache concurrently so the
+        # expanders below render from cache instead of serially awaiting
+        # one LLM round-trip per element
+        if st.session_state.tables or st.session_state.charts:
+            with st.spinner("Analyzing tables and charts..."):
+                prefetch_insights(st.session_state.tables, st.session_state.charts)
+
         # Display tables
         if st.session_state.tables:
             st.subheader("Tables from the Assignment")
@@ -532,7 +548,7 @@ def candidate_mode():
                     pdf_path = tmp_file.name
                 
                 # Extract text and other elements from the PDF
-                text, tables, charts = extract_text_and_elements_from_pdf(pdf_path)
+                text, tables, charts, page_texts = extract_text_and_elements_from_pdf(pdf_path)
                 
                 # Clean up the temporary file
                 os.unlink(pdf_path)
@@ -556,8 +572,9 @@ def candidate_mode():
                 with open(pdf_storage_path, 'wb') as f:
                     f.write(encrypted_pdf)
                 
-                # Process text into chunks for better handling
-                chunks = chunk_text(text)
+                # Process text into chunks for better handling, feeding the
+                # page list directly so chunking skips the marker re-split
+                chunks = chunk_text(page_texts)
                 
                 # Update the session state
                 st.session_state.pdf_text = text
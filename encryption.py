@@ -1,9 +1,10 @@
 import os
 import base64
+from functools import lru_cache
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-import json
+import orjson
 import hashlib
 
 # Generate a stable encryption key based on the assignment ID
@@ -24,33 +25,51 @@ def generate_key_from_id(assignment_id):
     key = base64.urlsafe_b64encode(kdf.derive(assignment_id.encode()))
     return key
 
+@lru_cache(maxsize=128)
+def _fernet(assignment_id):
+    """Build (and cache) the Fernet instance for an assignment ID
+
+    Key derivation runs 100k PBKDF2 iterations and Fernet construction
+    base64-decodes the key and sets up HMAC state, so reusing one
+    instance per assignment ID saves real work on every call.
+    """
+    return Fernet(generate_key_from_id(assignment_id))
+
 def encrypt_file(file_data, assignment_id):
     """Encrypt file data using the assignment ID"""
-    key = generate_key_from_id(assignment_id)
-    fernet = Fernet(key)
-    encrypted_data = fernet.encrypt(file_data)
-    return encrypted_data
+    return _fernet(assignment_id).encrypt(file_data)
 
 def decrypt_file(encrypted_data, assignment_id):
     """Decrypt file data using the assignment ID"""
-    key = generate_key_from_id(assignment_id)
-    fernet = Fernet(key)
-    decrypted_data = fernet.decrypt(encrypted_data)
-    return decrypted_data
+    return _fernet(assignment_id).decrypt(encrypted_data)
 
 def encrypt_data(data, assignment_id):
     """Encrypt any JSON-serializable data"""
-    # Convert data to JSON string
-    json_data = json.dumps(data).encode()
+    # orjson serializes straight to bytes, skipping the str -> bytes copy;
+    # OPT_NON_STR_KEYS matches stdlib json's coercion of int dict keys
+    # (DataFrame.to_dict() produces those for row indices)
+    json_data = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
     return encrypt_file(json_data, assignment_id)
 
 def decrypt_data(encrypted_data, assignment_id):
     """Decrypt data back to its original form"""
     json_data = decrypt_file(encrypted_data, assignment_id)
-    return json.loads(json_data)
+    return orjson.loads(json_data)
 
 def secure_file_path(assignment_id):
     """Create a secure file path based on assignment ID"""
-    # Create a hash of the assignment ID to obscure the actual file name
-    hashed_id = hashlib.sha256(assignment_id.encode()).hexdigest()
-    return os.path.join('data', f"{hashed_id}.enc")
\ No newline at end of file
+    # Create a hash of the assignment ID to obscure the actual file name.
+    # BLAKE2b with a 16-byte digest is faster than SHA-256 and is plenty
+    # for filename uniqueness; this is obfuscation, not a security boundary
+    hashed_id = hashlib.blake2b(assignment_id.encode(), digest_size=16).hexdigest()
+    path = os.path.join('data', f"{hashed_id}.enc")
+
+    # Assignments saved before the switch used a SHA-256 filename; keep
+    # resolving those so existing sharing links stay valid
+    if not os.path.exists(path):
+        legacy_id = hashlib.sha256(assignment_id.encode()).hexdigest()
+        legacy_path = os.path.join('data', f"{legacy_id}.enc")
+        if os.path.exists(legacy_path):
+            return legacy_path
+
+    return path
\ No newline at end of file
@@ -1,9 +1,70 @@
 import os
-from openai import OpenAI
+import re
+import orjson
+from functools import lru_cache
 
-# Initialize OpenAI client
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
-client = OpenAI(api_key=OPENAI_API_KEY)
+@lru_cache(maxsize=1)
+def _client():
+    """Create the OpenAI client on first use rather than at import time"""
+    from openai import OpenAI
+    return OpenAI(api_key=os.environ.get("OPENAI_API_KEY", ""))
+
+# Simple section detection based on common heading patterns. The styles
+# are combined into one multiline alternation so a whole chunk is scanned
+# in a single C-level pass instead of per-line regex calls; [ \t] classes
+# keep each alternative from spilling across line breaks.
+_SECTION_RE = re.compile(
+    r"^[ \t]*(?:"
+    r"#+[ \t]+(.+?)"  # Markdown headings
+    r"|([A-Z][A-Za-z \t]+):"  # Capitalized text with colon
+    r"|([A-Z][A-Za-z \t]+)"  # All-caps or capitalized standalone line
+    r"|(\d+\.[\d\.]*[ \t]+[A-Z][A-Za-z \t]+)"  # Numbered sections
+    r")[ \t]*$",
+    re.MULTILINE
+)
+
+@lru_cache(maxsize=64)
+def _cached_suggestions(prompt):
+    """
+    Generate navigation questions for a prompt, caching by prompt text
+
+    Reruns with the same document sample and previous interaction return
+    from memory instead of repeating the OpenAI round-trip. Errors
+    propagate so failed calls are never cached.
+    """
+    # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+    # do not change this unless explicitly requested by the user
+    response = _client().chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": "You are an assistant that generates helpful navigation questions for document exploration. Your questions should be insightful and help evaluators understand the document deeply."},
+            {"role": "user", "content": prompt}
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.7,
+        max_tokens=500
+    )
+
+    # Parse response JSON
+    response_content = response.choices[0].message.content
+    questions_data = orjson.loads(response_content)
+
+    # Extract questions array (handle different possible formats)
+    if isinstance(questions_data, list):
+        questions = questions_data
+    elif "questions" in questions_data:
+        questions = questions_data["questions"]
+    else:
+        # Try to find an array in the response
+        for key, value in questions_data.items():
+            if isinstance(value, list):
+                questions = value
+                break
+        else:
+            questions = []
+
+    # Return up to 6 questions as a tuple so the cached value is immutable
+    return tuple(questions[:6])
 
 def generate_navigation_suggestions(text, chunks, previous_question=None, previous_answer=None):
     """
@@ -54,40 +115,7 @@ def generate_navigation_suggestions(text, chunks, previous_question=None, previo
     """
     
     try:
-        # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-        # do not change this unless explicitly requested by the user
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are an assistant that generates helpful navigation questions for document exploration. Your questions should be insightful and help evaluators understand the document deeply."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        # Parse response JSON
-        import json
-        response_content = response.choices[0].message.content
-        questions_data = json.loads(response_content)
-        
-        # Extract questions array (handle different possible formats)
-        if isinstance(questions_data, list):
-            questions = questions_data
-        elif "questions" in questions_data:
-            questions = questions_data["questions"]
-        else:
-            # Try to find an array in the response
-            for key, value in questions_data.items():
-                if isinstance(value, list):
-                    questions = value
-                    break
-            else:
-                questions = []
-        
-        return questions[:6]  # Return up to 6 questions
-        
+        return list(_cached_suggestions(prompt))
     except Exception as e:
         print(f"Error generating navigation suggestions: {e}")
         # Fallback suggestions
@@ -110,14 +138,6 @@ def identify_document_sections(chunks):
     Returns:
         list: List of section dictionaries with titles and positions
     """
-    # Simple section detection based on common heading patterns
-    section_patterns = [
-        r"^#+\s+(.+)$",  # Markdown headings
-        r"^([A-Z][A-Za-z\s]+):$",  # Capitalized text with colon
-        r"^([A-Z][A-Za-z\s]+)$",  # All-caps or capitalized standalone line
-        r"^(\d+\.[\d\.]*\s+[A-Z][A-Za-z\s]+)$"  # Numbered sections
-    ]
-    
     sections = []
     current_page = 1
     
@@ -130,18 +150,14 @@ def identify_document_sections(chunks):
             current_page = page
         
         # Look for section headers in the chunk
-        lines = chunk_text.split("\n")
-        for line in lines:
-            for pattern in section_patterns:
-                match = re.search(pattern, line.strip())
-                if match:
-                    section_title = match.group(1)
-                    # Skip very short titles or common false positives
-                    if len(section_title) > 3 and section_title.lower() not in ["note", "figure", "table"]:
-                        sections.append({
-                            "title": section_title,
-                            "page": page,
-                            "preview": chunk_text[:100] + "..."
-                        })
+        for match in _SECTION_RE.finditer(chunk_text):
+            section_title = next(g for g in match.groups() if g)
+            # Skip very short titles or common false positives
+            if len(section_title) > 3 and section_title.lower() not in ["note", "figure", "table"]:
+                sections.append({
+                    "title": section_title,
+                    "page": page,
+                    "preview": chunk_text[:100] + "..."
+                })
     
     return sections
@@ -1,111 +1,191 @@
-import pdfplumber
+import os
 import pandas as pd
 import base64
 import re
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+from itertools import repeat
+
+# pypdfium2 (native PDFium bindings) extracts text an order of magnitude
+# faster than pdfplumber's pure-Python pipeline; use it for the text path
+# when installed and keep pdfplumber for tables and layout analysis
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# Figure/chart references used to locate context around detected charts
+_FIGURE_RE = re.compile(r'(Figure|Fig\.?|Chart|Graph|Plot)s?\s*\d+', re.IGNORECASE)
+
+# Worker processes cost ~100ms each to spawn, so only fan out page
+# processing for documents where parsing dominates that overhead
+_MIN_PAGES_FOR_PARALLEL = 8
+
+def _process_page(pdf_path, page_num):
+    """
+    Extract text, tables, and chart candidates from a single PDF page
+
+    Opens its own document handles because page objects are not picklable
+    and PDF library handles are not safe to share across processes.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        page_num (int): Zero-based page index to process
+
+    Returns:
+        tuple: (page_text, tables, charts) for this page; chart entries
+        have no "context" yet since that needs the full document text
+    """
+    # Deferred so importing this module doesn't pay pdfplumber's startup cost
+    import pdfplumber
+
+    tables = []
+    charts = []
+
+    with pdfplumber.open(pdf_path) as pdf:
+        page = pdf.pages[page_num]
+
+        # Extract text, preferring the native PDFium text path
+        if pdfium is not None:
+            pdfium_doc = pdfium.PdfDocument(pdf_path)
+            try:
+                page_text = pdfium_doc[page_num].get_textpage().get_text_range() or ""
+                page_text = page_text.replace("\r\n", "\n")
+            finally:
+                pdfium_doc.close()
+        else:
+            page_text = page.extract_text() or ""
+
+        # Extract tables
+        page_tables = page.extract_tables()
+        for i, table in enumerate(page_tables):
+            if table:
+                # Generate unique column names
+                num_columns = len(table[0]) if table and table[0] else len(table[1]) if table and len(table) > 1 else 0
+
+                # Either use first row as headers or create default headers
+                if table[0]:
+                    # Make sure column names are unique by adding a suffix if necessary
+                    col_names = []
+                    seen = {}
+                    for j, col in enumerate(table[0]):
+                        col_str = str(col).strip() if col else f"Col{j}"
+                        if not col_str:  # Handle empty column names
+                            col_str = f"Col{j}"
+
+                        # If the column name already exists, add a suffix
+                        if col_str in seen:
+                            seen[col_str] += 1
+                            col_str = f"{col_str}_{seen[col_str]}"
+                        else:
+                            seen[col_str] = 0
+
+                        col_names.append(col_str)
+
+                    # Create DataFrame with clean headers, building
+                    # column-wise so pandas infers each dtype in one pass
+                    # instead of routing rows through an object array
+                    rows = table[1:]
+                    df = pd.DataFrame({
+                        name: [row[j] if j < len(row) else None for row in rows]
+                        for j, name in enumerate(col_names)
+                    })
+                else:
+                    # No headers, create default column names
+                    df = pd.DataFrame({
+                        f"Col{j}": [row[j] if j < len(row) else None for row in table]
+                        for j in range(num_columns)
+                    })
+
+                tables.append({
+                    "page": page_num + 1,
+                    "table_id": f"page{page_num+1}_table{i+1}",
+                    "data": df
+                })
+
+        # Try to identify images/charts
+        # This is a heuristic approach since pdfplumber doesn't directly extract images
+        # We look for image-like content by checking for bounded areas
+        rects = page.rects
+        if len(rects) > 0:
+            # Filter out small rectangles that are likely not chart containers
+            potential_chart_rects = [rect for rect in rects if 
+                                   (rect['height'] > 50 and rect['width'] > 50) or 
+                                   (rect['height'] > 100 or rect['width'] > 100)]
+
+            # Create placeholders for charts
+            for i, rect in enumerate(potential_chart_rects):
+                crop_area = (rect['x0'], rect['y0'], rect['x1'], rect['y1'])
+
+                # Extract text within this area to check if it's a chart
+                area_text = page.within_bbox(crop_area).extract_text() or ""
+
+                # Check if area contains words suggesting it's a chart
+                chart_keywords = ['chart', 'figure', 'graph', 'plot', 'histogram', 'bar', 'pie', 'line', 'scatter']
+                is_likely_chart = any(keyword in area_text.lower() for keyword in chart_keywords)
+
+                if is_likely_chart or len(area_text) < 100:  # If very little text, might be a chart
+                    charts.append({
+                        "page": page_num + 1,
+                        "chart_id": f"page{page_num+1}_chart{i+1}",
+                        "area": crop_area,
+                        "description": f"Chart found on page {page_num+1}",
+                        "area_text": area_text
+                    })
+
+    return page_text, tables, charts
 
 def extract_text_and_elements_from_pdf(pdf_path):
     """
     Extract text, tables, and images from a PDF file
-    
+
+    Pages are independent, so large documents are processed in parallel
+    across worker processes and the results merged in page order.
+
     Args:
         pdf_path (str): Path to the PDF file
-        
+
     Returns:
-        tuple: (text, tables, charts)
+        tuple: (text, tables, charts, page_texts)
     """
+    import pdfplumber
+
     text = ""
     tables = []
     charts = []
-    
+    page_texts = []
+
     try:
         with pdfplumber.open(pdf_path) as pdf:
-            # Process each page
-            for page_num, page in enumerate(pdf.pages):
-                # Extract text
-                page_text = page.extract_text() or ""
-                text += f"\n--- Page {page_num + 1} ---\n{page_text}"
-                
-                # Extract tables
-                page_tables = page.extract_tables()
-                for i, table in enumerate(page_tables):
-                    if table:
-                        # Generate unique column names
-                        num_columns = len(table[0]) if table and table[0] else len(table[1]) if table and len(table) > 1 else 0
-                        
-                        # Either use first row as headers or create default headers
-                        if table[0]:
-                            # Make sure column names are unique by adding a suffix if necessary
-                            col_names = []
-                            seen = {}
-                            for j, col in enumerate(table[0]):
-                                col_str = str(col).strip() if col else f"Col{j}"
-                                if not col_str:  # Handle empty column names
-                                    col_str = f"Col{j}"
-                                
-                                # If the column name already exists, add a suffix
-                                if col_str in seen:
-                                    seen[col_str] += 1
-                                    col_str = f"{col_str}_{seen[col_str]}"
-                                else:
-                                    seen[col_str] = 0
-                                
-                                col_names.append(col_str)
-                            
-                            # Create DataFrame with clean headers and data
-                            df = pd.DataFrame(table[1:], columns=col_names)
-                        else:
-                            # No headers, create default column names
-                            df = pd.DataFrame(table, columns=[f"Col{j}" for j in range(num_columns)])
-                            
-                        tables.append({
-                            "page": page_num + 1,
-                            "table_id": f"page{page_num+1}_table{i+1}",
-                            "data": df
-                        })
-                
-                # Try to identify images/charts
-                # This is a heuristic approach since pdfplumber doesn't directly extract images
-                # We look for image-like content by checking for bounded areas
-                rects = page.rects
-                if len(rects) > 0:
-                    # Filter out small rectangles that are likely not chart containers
-                    potential_chart_rects = [rect for rect in rects if 
-                                           (rect['height'] > 50 and rect['width'] > 50) or 
-                                           (rect['height'] > 100 or rect['width'] > 100)]
-                    
-                    # Create placeholders for charts
-                    for i, rect in enumerate(potential_chart_rects):
-                        crop_area = (rect['x0'], rect['y0'], rect['x1'], rect['y1'])
-                        
-                        # Extract text within this area to check if it's a chart
-                        area_text = page.within_bbox(crop_area).extract_text() or ""
-                        
-                        # Check if area contains words suggesting it's a chart
-                        chart_keywords = ['chart', 'figure', 'graph', 'plot', 'histogram', 'bar', 'pie', 'line', 'scatter']
-                        is_likely_chart = any(keyword in area_text.lower() for keyword in chart_keywords)
-                        
-                        if is_likely_chart or len(area_text) < 100:  # If very little text, might be a chart
-                            # Extract surrounding text to get chart context
-                            surrounding_text = extract_text_around_chart(text, {
-                                "page": page_num + 1,
-                                "chart_id": f"page{page_num+1}_chart{i+1}"
-                            })
-                            
-                            charts.append({
-                                "page": page_num + 1,
-                                "chart_id": f"page{page_num+1}_chart{i+1}",
-                                "area": crop_area,
-                                "description": f"Chart found on page {page_num+1}",
-                                "area_text": area_text,
-                                "context": surrounding_text
-                            })
-    
+            n_pages = len(pdf.pages)
+
+        if n_pages >= _MIN_PAGES_FOR_PARALLEL and (os.cpu_count() or 1) > 1:
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                results = list(executor.map(_process_page, repeat(pdf_path), range(n_pages)))
+        else:
+            results = [_process_page(pdf_path, page_num) for page_num in range(n_pages)]
+
+        # Merge per-page results in page order
+        for page_num, (page_text, page_tables, page_charts) in enumerate(results):
+            text += f"\n--- Page {page_num + 1} ---\n{page_text}"
+            page_texts.append(page_text)
+            tables.extend(page_tables)
+            charts.extend(page_charts)
+
+        # Fill in chart context now that the full document text is
+        # assembled; charts on the same page share one page scan
+        context_by_page = {}
+        for chart in charts:
+            page_num = chart["page"]
+            if page_num not in context_by_page:
+                context_by_page[page_num] = extract_text_around_chart(text, chart)
+            chart["context"] = context_by_page[page_num]
+
     except Exception as e:
         print(f"Error processing PDF: {e}")
-        return f"Error processing PDF: {e}", [], []
-    
-    return text, tables, charts
+        return f"Error processing PDF: {e}", [], [], []
+
+    return text, tables, charts, page_texts
 
 def extract_table_as_markdown(table_data):
     """
@@ -146,20 +226,19 @@ def extract_text_around_chart(text, chart_info, context_chars=200):
         page_end = len(text)
     
     page_text = text[page_start:page_end]
-    
-    # Look for figure/chart references in the text
-    figure_pattern = re.compile(r'(Figure|Fig\.?|Chart|Graph|Plot)s?\s*\d+', re.IGNORECASE)
-    matches = figure_pattern.finditer(page_text)
-    
-    for match in matches:
+
+    # Look for the first figure/chart reference in the text; only the
+    # first match was ever used, so a single search replaces the old
+    # finditer loop
+    match = _FIGURE_RE.search(page_text)
+    if match:
         start = max(0, match.start() - context_chars)
         end = min(len(page_text), match.end() + context_chars)
         return page_text[start:end]
-    
+
     # If no specific figure reference found, return a portion of the page text
-    chart_id = chart_info["chart_id"]
     middle = len(page_text) // 2
     start = max(0, middle - context_chars)
     end = min(len(page_text), middle + context_chars)
-    
-    return f"Context for {chart_id} on page {page_num}:\n{page_text[start:end]}"
+
+    return f"Context from page {page_num}:\n{page_text[start:end]}"
@@ -1,11 +1,18 @@
 import os
 import re
+from functools import lru_cache
 from text_chunker import get_relevant_chunks
-from openai import OpenAI
 
-# Initialize OpenAI client
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
-client = OpenAI(api_key=OPENAI_API_KEY)
+@lru_cache(maxsize=1)
+def _client():
+    """Create the OpenAI client on first use
+
+    Importing and constructing the OpenAI SDK costs hundreds of ms, which
+    every Streamlit session paid at import time even before any question
+    was asked.
+    """
+    from openai import OpenAI
+    return OpenAI(api_key=os.environ.get("OPENAI_API_KEY", ""))
 
 # Define content restriction constants
 MAX_QUOTE_LENGTH = 150  # Maximum characters for direct quotes
@@ -15,6 +22,158 @@ MAX_CONSECUTIVE_QUOTES = 3  # Maximum number of consecutive direct quote request
 consecutive_quote_requests = 0
 previous_chunks_provided = []
 
+# Patterns for detecting direct content extraction requests, combined into a
+# single alternation and compiled once at import time so each question is
+# classified in one regex pass
+_EXTRACTION_PATTERNS = [
+    r"extract\s+(?:all|complete|entire|full|whole)\s+(?:text|content|document|assignment|pdf)",
+    r"(?:show|give|provide)\s+(?:me|us)?\s+(?:all|complete|entire|full|whole)\s+(?:text|content|document|assignment|pdf)",
+    r"(?:copy|paste)\s+(?:all|complete|entire|full|whole)\s+(?:text|content|document|assignment|pdf)",
+    r"(?:show|give|provide)\s+(?:me|us)?\s+(?:the\s+)?(?:next|previous|following|remaining|rest)\s+(?:part|section|text|content)",
+    r"continue\s+(?:from|where\s+you\s+left\s+off)",
+    r"(?:what|show)\s+(?:is|are|comes)\s+(?:after|before)\s+[\"\'].*?[\"\']"
+]
+_EXTRACTION_RE = re.compile("|".join(f"(?:{p})" for p in _EXTRACTION_PATTERNS))
+
+# Patterns suggesting sequential "give me the next part" style extraction
+_SEQUENTIAL_PATTERNS = [
+    r"continue",
+    r"next part",
+    r"more details",
+    r"next section",
+    r"go on",
+    r"proceed",
+    r"then what",
+    r"what follows",
+    r"what happens next"
+]
+_SEQUENTIAL_RE = re.compile("|".join(f"(?:{p})" for p in _SEQUENTIAL_PATTERNS))
+
+# Quotes longer than MAX_QUOTE_LENGTH get truncated in post-processing
+_LONG_QUOTE_RE = re.compile(r'\"([^\"]{' + str(MAX_QUOTE_LENGTH) + r',})\"')
+
+# Hyperscan, when available, compiles each pattern battery into a single DFA
+# that matches all patterns in one scan of the question; without it we fall
+# back to the combined alternations above
+try:
+    import hyperscan
+
+    def _compile_hs_db(patterns):
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[p.encode() for p in patterns],
+            ids=list(range(len(patterns))),
+            flags=[hyperscan.HS_FLAG_CASELESS] * len(patterns)
+        )
+        return db
+
+    _EXTRACTION_DB = _compile_hs_db(_EXTRACTION_PATTERNS)
+    _SEQUENTIAL_DB = _compile_hs_db(_SEQUENTIAL_PATTERNS)
+except ImportError:
+    hyperscan = None
+    _EXTRACTION_DB = None
+    _SEQUENTIAL_DB = None
+
+def _battery_match(db, pattern, text):
+    """Check text against a pattern battery via Hyperscan or the compiled regex"""
+    if db is None:
+        return pattern.search(text) is not None
+
+    hit = False
+
+    def _on_match(pat_id, start, end, flags, context):
+        nonlocal hit
+        hit = True
+        return 1  # non-zero return stops the scan after the first hit
+
+    try:
+        db.scan(text.encode(), match_event_handler=_on_match)
+    except hyperscan.error:
+        pass  # raised when the scan is terminated early by the handler
+    return hit
+
+# System prompt for direct chart/figure analysis (chunks is None)
+_CHART_SYSTEM_PROMPT = """
+You are a chart analysis expert helping evaluate an assignment. Your task is to:
+
+1. Analyze the provided text describing a chart or figure
+2. Provide insightful analysis based only on the text description
+3. Do NOT attempt to recreate or visualize the chart
+4. Focus on explaining what insights the chart likely conveys
+5. Format your response as 3-5 bullet points for readability
+
+Do not use any external knowledge or make up data. Only analyze what's in the text.
+"""
+
+# System prompt for document-grounded Q&A
+_DOCUMENT_SYSTEM_PROMPT = """
+You are a secure academic assistant helping evaluate an assignment. Follow these strict rules:
+
+1. Answer ONLY based on the provided context. If the answer is not in the context, say "I don't have information about that in this assignment."
+2. Do not use any external knowledge beyond the provided context.
+3. Keep direct quotes from the assignment to under 150 characters and always put them in quotation marks.
+4. Prefer paraphrasing over quoting whenever possible.
+5. Never provide complete code solutions or full paragraphs from the assignment.
+6. If asked to extract large sections of content, refuse and explain the policy.
+7. Format and structure your answer to be easily readable.
+
+Remember, your purpose is to help evaluate the quality of work while protecting the assignment content.
+"""
+
+@lru_cache(maxsize=256)
+def _cached_chart_answer(question):
+    """
+    Answer a self-contained chart analysis prompt, caching by prompt text
+
+    Repeat prompts (Streamlit reruns re-request the same insights) return
+    from memory instead of paying another 1-3 s OpenAI round-trip. Errors
+    propagate so failed calls are never cached.
+    """
+    # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+    # do not change this unless explicitly requested by the user
+    response = _client().chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": _CHART_SYSTEM_PROMPT},
+            {"role": "user", "content": question}
+        ],
+        temperature=0.3,
+        max_tokens=600
+    )
+
+    return response.choices[0].message.content
+
+@lru_cache(maxsize=256)
+def _cached_document_answer(question, context):
+    """
+    Answer a document-grounded question, caching by (question, context)
+
+    Identical questions over the same retrieved chunks are answered from
+    memory. Errors propagate so failed calls are never cached.
+    """
+    # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+    # do not change this unless explicitly requested by the user
+    response = _client().chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": _DOCUMENT_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Question: {question}\n\nContext from the assignment:\n{context}"}
+        ],
+        temperature=0.3,
+        max_tokens=800
+    )
+
+    answer = response.choices[0].message.content
+
+    # Post-processing to enforce quote length limits
+    long_quotes = _LONG_QUOTE_RE.findall(answer)
+
+    for long_quote in long_quotes:
+        truncated_quote = long_quote[:MAX_QUOTE_LENGTH-3] + "..."
+        answer = answer.replace(f'"{long_quote}"', f'"{truncated_quote}"')
+
+    return answer
+
 def answer_question(question, chunks):
     """
     Generate a secure answer to a question based on provided document chunks
@@ -31,48 +190,14 @@ def answer_question(question, chunks):
     # Special case for direct chart analysis (when chunks is None)
     if chunks is None:
         # In this case, question contains all the context needed for analysis
-        system_prompt = """
-        You are a chart analysis expert helping evaluate an assignment. Your task is to:
-        
-        1. Analyze the provided text describing a chart or figure
-        2. Provide insightful analysis based only on the text description
-        3. Do NOT attempt to recreate or visualize the chart
-        4. Focus on explaining what insights the chart likely conveys
-        5. Format your response as 3-5 bullet points for readability
-        
-        Do not use any external knowledge or make up data. Only analyze what's in the text.
-        """
-        
         try:
-            # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-            # do not change this unless explicitly requested by the user
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": question}
-                ],
-                temperature=0.3,
-                max_tokens=600
-            )
-            
-            return response.choices[0].message.content
-            
+            return _cached_chart_answer(question)
         except Exception as e:
             return f"Error analyzing chart: {str(e)}. Please try again."
     
     # Regular document-based Q&A flow
     # Check if this is a request for direct content extraction
-    extraction_patterns = [
-        r"extract\s+(?:all|complete|entire|full|whole)\s+(?:text|content|document|assignment|pdf)",
-        r"(?:show|give|provide)\s+(?:me|us)?\s+(?:all|complete|entire|full|whole)\s+(?:text|content|document|assignment|pdf)",
-        r"(?:copy|paste)\s+(?:all|complete|entire|full|whole)\s+(?:text|content|document|assignment|pdf)",
-        r"(?:show|give|provide)\s+(?:me|us)?\s+(?:the\s+)?(?:next|previous|following|remaining|rest)\s+(?:part|section|text|content)",
-        r"continue\s+(?:from|where\s+you\s+left\s+off)",
-        r"(?:what|show)\s+(?:is|are|comes)\s+(?:after|before)\s+[\"\'].*?[\"\']"
-    ]
-    
-    if any(re.search(pattern, question.lower()) for pattern in extraction_patterns):
+    if _battery_match(_EXTRACTION_DB, _EXTRACTION_RE, question.lower()):
         return (
             "I'm not able to extract or display large portions of the assignment content directly. "
             "This restriction helps protect the assignment's intellectual property. "
@@ -102,49 +227,52 @@ def answer_question(question, chunks):
     context = ""
     for chunk in relevant_chunks:
         context += f"\n{chunk['text']}\n"
-    
-    # Construct the prompt for the AI
-    system_prompt = """
-    You are a secure academic assistant helping evaluate an assignment. Follow these strict rules:
-    
-    1. Answer ONLY based on the provided context. If the answer is not in the context, say "I don't have information about that in this assignment."
-    2. Do not use any external knowledge beyond the provided context.
-    3. Keep direct quotes from the assignment to under 150 characters and always put them in quotation marks.
-    4. Prefer paraphrasing over quoting whenever possible.
-    5. Never provide complete code solutions or full paragraphs from the assignment.
-    6. If asked to extract large sections of content, refuse and explain the policy.
-    7. Format and structure your answer to be easily readable.
-    
-    Remember, your purpose is to help evaluate the quality of work while protecting the assignment content.
+
+    try:
+        return _cached_document_answer(question, context)
+    except Exception as e:
+        return f"Error generating answer: {str(e)}. Please try again or reformulate your question."
+
+def answer_question_stream(question, chunks):
     """
-    
+    Stream an answer as it is generated, yielding text fragments
+
+    Lets the UI paint the first tokens immediately instead of blocking
+    behind the full response. Only self-contained prompts (chunks is
+    None) stream raw model output; document-grounded answers go through
+    answer_question and are yielded whole, because the quote-length
+    post-processing there needs the complete text before anything can
+    be shown.
+
+    Args:
+        question (str): User's question (or self-contained prompt)
+        chunks (list): Relevant document chunks, or None
+
+    Yields:
+        str: Fragments of the answer text
+    """
+    if chunks is not None:
+        yield answer_question(question, chunks)
+        return
+
     try:
         # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
         # do not change this unless explicitly requested by the user
-        response = client.chat.completions.create(
+        stream = _client().chat.completions.create(
             model="gpt-4o",
             messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Question: {question}\n\nContext from the assignment:\n{context}"}
+                {"role": "system", "content": _CHART_SYSTEM_PROMPT},
+                {"role": "user", "content": question}
             ],
             temperature=0.3,
-            max_tokens=800
+            max_tokens=600,
+            stream=True
         )
-        
-        answer = response.choices[0].message.content
-        
-        # Post-processing to enforce quote length limits
-        quote_pattern = r'\"([^\"]{' + str(MAX_QUOTE_LENGTH) + r',})\"'
-        long_quotes = re.findall(quote_pattern, answer)
-        
-        for long_quote in long_quotes:
-            truncated_quote = long_quote[:MAX_QUOTE_LENGTH-3] + "..."
-            answer = answer.replace(f'"{long_quote}"', f'"{truncated_quote}"')
-        
-        return answer
-        
+        for event in stream:
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
     except Exception as e:
-        return f"Error generating answer: {str(e)}. Please try again or reformulate your question."
+        yield f"Error analyzing chart: {str(e)}. Please try again."
 
 def check_content_extraction_attempt(questions, threshold=0.7):
     """
@@ -157,23 +285,10 @@ def check_content_extraction_attempt(questions, threshold=0.7):
     Returns:
         bool: True if extraction attempt detected
     """
-    # Simple extraction pattern detection
-    sequential_patterns = [
-        r"continue",
-        r"next part",
-        r"more details",
-        r"next section",
-        r"go on",
-        r"proceed",
-        r"then what",
-        r"what follows",
-        r"what happens next"
-    ]
-    
     # Count how many questions match extraction patterns
     extraction_attempts = sum(
-        1 for q in questions[-3:] 
-        if any(re.search(pattern, q.lower()) for pattern in sequential_patterns)
+        1 for q in questions[-3:]
+        if _battery_match(_SEQUENTIAL_DB, _SEQUENTIAL_RE, q.lower())
     )
     
     # If more than threshold of recent questions match patterns, flag as extraction attempt
@@ -199,7 +314,7 @@ def summarize_without_extraction(text, max_summary_length=300):
     try:
         # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
         # do not change this unless explicitly requested by the user
-        response = client.chat.completions.create(
+        response = _client().chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": system_prompt},
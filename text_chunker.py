@@ -1,120 +1,255 @@
 import re
+from dataclasses import dataclass, field
+from itertools import accumulate
 
 # This is our own tokenizer to avoid NLTK dependencies
 # It's designed to be simple but effective for PDF content
+# Pattern to split on periods, question marks, and exclamation points
+# followed by spaces or newlines, but avoid splitting after common abbreviations
+_SENTENCE_BOUNDARY_RE = re.compile(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|\!)\s')
+
+# Word tokens used for retrieval scoring
+_WORD_RE = re.compile(r'\b\w+\b')
+
+def _sentence_spans(text):
+    """
+    Find sentence spans in text as (start, end) character offsets
+
+    Args:
+        text (str): Text to scan for sentence boundaries
+
+    Returns:
+        list: List of (start, end) tuples, whitespace-trimmed, empty spans removed
+    """
+    spans = []
+    start = 0
+    for match in _SENTENCE_BOUNDARY_RE.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(text)))
+
+    # Trim surrounding whitespace and drop empty spans
+    trimmed = []
+    for s, e in spans:
+        while s < e and text[s].isspace():
+            s += 1
+        while e > s and text[e - 1].isspace():
+            e -= 1
+        if s < e:
+            trimmed.append((s, e))
+    return trimmed
+
 def simple_sent_tokenize(text):
     """
     Simple sentence tokenizer using regex patterns for common sentence delimiters
-    
+
     Args:
         text (str): Text to tokenize into sentences
-        
+
     Returns:
         list: List of sentences
     """
-    # Pattern to split on periods, question marks, and exclamation points
-    # followed by spaces or newlines, but avoid splitting after common abbreviations
-    text = text.replace("\n", " ")
-    pattern = r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|\!)\s'
-    sentences = re.split(pattern, text)
-    # Clean up and return non-empty sentences
-    return [s.strip() for s in sentences if s.strip()]
+    normalized = text.replace("\n", " ")
+    return [normalized[s:e] for s, e in _sentence_spans(normalized)]
+
+
+@dataclass
+class ChunkStore:
+    """
+    Struct-of-arrays storage for document chunks
+
+    Each chunk field lives in its own parallel list, so scans that only
+    touch one field (like retrieval scoring over texts) walk a single
+    contiguous list instead of hopping between per-chunk dicts. Indexing
+    and iteration return per-chunk dict views for backward compatibility
+    with code that expects a list of chunk dictionaries.
+    """
+    texts: list = field(default_factory=list)
+    pages: list = field(default_factory=list)
+    start_chars: list = field(default_factory=list)
+    end_chars: list = field(default_factory=list)
+    sentences: list = field(default_factory=list)
+    topics: list = field(default_factory=list)
+    # Lowercased texts and per-chunk word sets for scanning, built lazily
+    # and never serialized (rebuilt from texts after from_records)
+    _texts_lower: list = field(default=None, init=False, repr=False)
+    _word_sets: list = field(default=None, init=False, repr=False)
+
+    def append(self, text, page, start_char, end_char, sentences, topics=None):
+        """Append one chunk's fields to the parallel arrays"""
+        self.texts.append(text)
+        self.pages.append(page)
+        self.start_chars.append(start_char)
+        self.end_chars.append(end_char)
+        self.sentences.append(sentences)
+        self.topics.append(topics)
+        self._texts_lower = None
+        self._word_sets = None
+
+    def texts_lower(self):
+        """Lowercased chunk texts, computed once and reused across scans"""
+        if self._texts_lower is None:
+            self._texts_lower = [text.lower() for text in self.texts]
+        return self._texts_lower
+
+    def word_sets(self):
+        """Per-chunk sets of lowercased word tokens, built on first use"""
+        if self._word_sets is None:
+            self._word_sets = [
+                frozenset(_WORD_RE.findall(text)) for text in self.texts_lower()
+            ]
+        return self._word_sets
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __bool__(self):
+        return bool(self.texts)
+
+    def __getitem__(self, i):
+        chunk = {
+            "text": self.texts[i],
+            "page": self.pages[i],
+            "start_char": self.start_chars[i],
+            "end_char": self.end_chars[i],
+            "sentences": self.sentences[i]
+        }
+        if self.topics[i] is not None:
+            chunk["topics"] = self.topics[i]
+        return chunk
+
+    def __iter__(self):
+        for i in range(len(self.texts)):
+            yield self[i]
+
+    def to_records(self):
+        """Convert to a plain list of chunk dicts (e.g. for serialization)"""
+        return [self[i] for i in range(len(self.texts))]
+
+    @classmethod
+    def from_records(cls, records):
+        """Rebuild a ChunkStore from a list of chunk dicts"""
+        store = cls()
+        for chunk in records:
+            store.append(
+                chunk["text"],
+                chunk["page"],
+                chunk.get("start_char", 0),
+                chunk.get("end_char", 0),
+                chunk.get("sentences", []),
+                chunk.get("topics")
+            )
+        return store
 
 def chunk_text(text, max_chunk_size=1000, overlap=200):
     """
     Split text into overlapping chunks
-    
+
     Args:
-        text (str): The document text to chunk
+        text (str or list): The document text to chunk, or the list of
+            per-page texts straight from the PDF processor
         max_chunk_size (int): Maximum size of each chunk
         overlap (int): Number of characters to overlap between chunks
-        
+
     Returns:
-        list: List of chunk dictionaries with text and metadata
+        ChunkStore: Chunks stored as parallel field arrays
     """
-    chunks = []
-    
-    # Split text by pages first (if page markers are present)
-    pages = re.split(r'---\s*Page\s+\d+\s*---', text)
-    pages = [p for p in pages if p.strip()]  # Remove empty pages
-    
-    # If no pages were detected, treat the whole text as a single page
-    if not pages:
-        pages = [text]
-    
-    current_position = 0
-    
+    chunks = ChunkStore()
+
+    if isinstance(text, str):
+        # Split text by pages first (if page markers are present)
+        pages = re.split(r'---\s*Page\s+\d+\s*---', text)
+        pages = [p for p in pages if p.strip()]  # Remove empty pages
+
+        # If no pages were detected, treat the whole text as a single page
+        if not pages:
+            pages = [text]
+    else:
+        # The PDF processor already has the pages separate; consuming them
+        # directly skips the marker round-trip and keeps real page numbers
+        # even when some pages are empty
+        pages = text
+
+    # Cumulative character offset of each page, computed once up front so
+    # chunk positions are plain additions instead of running bookkeeping
+    page_offsets = [0] + list(accumulate(len(p) for p in pages))
+
     for page_idx, page_text in enumerate(pages):
         # Skip empty pages
         if not page_text.strip():
             continue
-            
-        page_position = 0
-        
-        # Split the page into sentences using our custom tokenizer
-        sentences = simple_sent_tokenize(page_text)
-        
-        current_chunk = ""
-        current_chunk_sentences = []
-        
-        for sentence in sentences:
+
+        # Work on offsets into the normalized page text so each chunk is
+        # produced by a single slice instead of repeated string concatenation.
+        # replace() keeps the text length unchanged, so offsets stay valid.
+        page_norm = page_text.replace("\n", " ")
+        sentence_spans = _sentence_spans(page_norm)
+        page_offset = page_offsets[page_idx]
+
+        chunk_start = None
+        chunk_end = None
+        chunk_spans = []
+
+        for span_start, span_end in sentence_spans:
             # If adding this sentence exceeds the max chunk size and we already have content,
             # save the current chunk and start a new one with overlap
-            if len(current_chunk) + len(sentence) > max_chunk_size and current_chunk:
-                # Create chunk with metadata
-                chunk_data = {
-                    "text": current_chunk,
-                    "page": page_idx + 1,
-                    "start_char": current_position + page_position - len(current_chunk),
-                    "end_char": current_position + page_position,
-                    "sentences": current_chunk_sentences
-                }
-                chunks.append(chunk_data)
-                
-                # Start a new chunk with overlap
-                # Find overlap by counting back from the end
-                overlap_text = ""
-                overlap_sentences = []
-                remaining_overlap = min(overlap, len(current_chunk))
-                
-                for s in reversed(current_chunk_sentences):
-                    if len(s) <= remaining_overlap:
-                        overlap_text = s + overlap_text
-                        overlap_sentences.insert(0, s)
-                        remaining_overlap -= len(s)
-                        if remaining_overlap <= 0:
-                            break
-                
-                current_chunk = overlap_text
-                current_chunk_sentences = overlap_sentences
-            
+            if chunk_start is not None and span_end - chunk_start > max_chunk_size and chunk_end > chunk_start:
+                chunks.append(
+                    page_norm[chunk_start:chunk_end],
+                    page_idx + 1,
+                    page_offset + chunk_start,
+                    page_offset + chunk_end,
+                    [page_norm[s:e] for s, e in chunk_spans]
+                )
+
+                # Start a new chunk with overlap: walk sentence spans backward
+                # until the cumulative length reaches the overlap target, then
+                # restart the chunk at that span's offset
+                remaining_overlap = min(overlap, chunk_end - chunk_start)
+                overlap_spans = []
+                for s, e in reversed(chunk_spans):
+                    if e - s > remaining_overlap:
+                        break
+                    overlap_spans.insert(0, (s, e))
+                    remaining_overlap -= e - s
+                    if remaining_overlap <= 0:
+                        break
+
+                if overlap_spans:
+                    chunk_start = overlap_spans[0][0]
+                    chunk_end = overlap_spans[-1][1]
+                    chunk_spans = overlap_spans
+                else:
+                    chunk_start = None
+                    chunk_end = None
+                    chunk_spans = []
+
             # Add the sentence to the current chunk
-            current_chunk += sentence
-            current_chunk_sentences.append(sentence)
-        
+            if chunk_start is None:
+                chunk_start = span_start
+            chunk_end = span_end
+            chunk_spans.append((span_start, span_end))
+
         # Don't forget to add the last chunk of the page
-        if current_chunk:
-            chunk_data = {
-                "text": current_chunk,
-                "page": page_idx + 1,
-                "start_char": current_position + page_position - len(current_chunk),
-                "end_char": current_position + page_position,
-                "sentences": current_chunk_sentences
-            }
-            chunks.append(chunk_data)
-        
-        # Update the current position with the page length
-        current_position += len(page_text)
-    
+        if chunk_spans:
+            chunks.append(
+                page_norm[chunk_start:chunk_end],
+                page_idx + 1,
+                page_offset + chunk_start,
+                page_offset + chunk_end,
+                [page_norm[s:e] for s, e in chunk_spans]
+            )
+
+
     return chunks
 
 def identify_chunk_topics(chunks):
     """
     Identify the main topics or themes for each chunk
-    
+
     Args:
         chunks (list): List of text chunks
-        
+
     Returns:
         list: List of chunks with topic information added
     """
@@ -128,57 +263,66 @@ def identify_chunk_topics(chunks):
         "reference": ["reference", "citation", "bibliography", "cite", "source"],
         "code": ["function", "class", "method", "variable", "code", "algorithm", "pseudo"]
     }
-    
-    for chunk in chunks:
-        chunk_topics = []
-        text_lower = chunk["text"].lower()
-        
-        for topic, keywords in topic_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                chunk_topics.append(topic)
-        
+
+    def topics_for(text_lower):
+        chunk_topics = [
+            topic for topic, keywords in topic_keywords.items()
+            if any(keyword in text_lower for keyword in keywords)
+        ]
         # Add a generic topic if none found
-        if not chunk_topics:
-            chunk_topics = ["content"]
-        
-        chunk["topics"] = chunk_topics
-    
+        return chunk_topics or ["content"]
+
+    if isinstance(chunks, ChunkStore):
+        for i, text_lower in enumerate(chunks.texts_lower()):
+            chunks.topics[i] = topics_for(text_lower)
+    else:
+        for chunk in chunks:
+            chunk["topics"] = topics_for(chunk["text"].lower())
+
     return chunks
 
 def get_relevant_chunks(query, chunks, top_k=3):
     """
     Simple keyword-based retrieval to find chunks relevant to a query
-    
+
     Args:
         query (str): The user's question or query
         chunks (list): List of text chunks
         top_k (int): Number of chunks to return
-        
+
     Returns:
         list: Top k most relevant chunks
     """
     # This is a simple keyword matching approach
     # A production system would use embeddings and vector similarity
-    
-    query_words = set(re.findall(r'\b\w+\b', query.lower()))
-    
-    # Score each chunk by the count of query words it contains
-    chunk_scores = []
-    for i, chunk in enumerate(chunks):
-        chunk_text = chunk["text"].lower()
-        # Count the query words that appear in the chunk
-        matching_words = sum(1 for word in query_words if word in chunk_text)
-        # Score is the count of matching words
-        chunk_scores.append((i, matching_words))
-    
+
+    query_words = set(_WORD_RE.findall(query.lower()))
+
+    if isinstance(chunks, ChunkStore):
+        # Chunk word sets are tokenized once and reused across queries, so
+        # each chunk scores with a single C-level set intersection instead
+        # of one substring scan per query word
+        chunk_scores = [
+            (i, len(query_words & words))
+            for i, words in enumerate(chunks.word_sets())
+        ]
+    else:
+        # Score each chunk by the count of query words it contains
+        chunk_scores = []
+        for i, chunk in enumerate(chunks):
+            text_lower = chunk["text"].lower()
+            # Count the query words that appear in the chunk
+            matching_words = sum(1 for word in query_words if word in text_lower)
+            chunk_scores.append((i, matching_words))
+
     # Sort by score in descending order
     chunk_scores.sort(key=lambda x: x[1], reverse=True)
-    
+
     # Return the top_k chunks
     top_chunks = [chunks[idx] for idx, score in chunk_scores[:top_k] if score > 0]
-    
+
     # If no matching chunks, return the first chunk as a fallback
     if not top_chunks and chunks:
         top_chunks = [chunks[0]]
-    
+
     return top_chunks
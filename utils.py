@@ -3,18 +3,110 @@ import re
 import pandas as pd
 from io import BytesIO
 
+# Patterns that suggest an attempt to extract large content, combined into
+# a single alternation compiled once at import time so each question is
+# classified in one regex pass; IGNORECASE replaces the per-call .lower()
+# copy of the question
+_EXTRACTION_PATTERNS = [
+    r"extract\s+(?:all|complete|entire|full|whole)",
+    r"(?:show|give|provide)\s+(?:me|us)?\s+(?:all|complete|entire|full|whole)",
+    r"(?:copy|paste)\s+(?:all|complete|entire|full|whole)",
+    r"(?:next|previous|following|remaining|rest)\s+(?:part|section|text|content)",
+    r"continue\s+(?:from|where\s+you\s+left\s+off)",
+    r"what\s+(?:is|are|comes)\s+(?:after|before)"
+]
+_EXTRACTION_RE = re.compile("|".join(f"(?:{p})" for p in _EXTRACTION_PATTERNS), re.IGNORECASE)
+
+# Words that suggest a query is iterating through content sequentially.
+# All plain literals, so membership is decided with C-level substring
+# scans rather than the regex engine.
+_SEQUENTIAL_WORDS = (
+    "continue",
+    "next",
+    "more",
+    "go on",
+    "proceed",
+    "then",
+    "after",
+    "following"
+)
+
+# Hyperscan, when available, compiles each pattern battery into a single DFA
+# that matches all patterns in one scan of the query; without it we fall
+# back to the combined alternations above (same arrangement as secure_qa.py)
+try:
+    import hyperscan
+
+    def _compile_hs_db(patterns):
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[p.encode() for p in patterns],
+            ids=list(range(len(patterns))),
+            flags=[hyperscan.HS_FLAG_CASELESS] * len(patterns)
+        )
+        return db
+
+    _EXTRACTION_DB = _compile_hs_db(_EXTRACTION_PATTERNS)
+except ImportError:
+    hyperscan = None
+    _EXTRACTION_DB = None
+
+def _battery_match(db, pattern, text):
+    """Check text against a pattern battery via Hyperscan or the compiled regex"""
+    if db is None:
+        return pattern.search(text) is not None
+
+    hit = False
+
+    def _on_match(pat_id, start, end, flags, context):
+        nonlocal hit
+        hit = True
+        return 1  # non-zero return stops the scan after the first hit
+
+    try:
+        db.scan(text.encode(), match_event_handler=_on_match)
+    except hyperscan.error:
+        pass  # raised when the scan is terminated early by the handler
+    return hit
+
+# Hashes keyed by cheap upload fingerprints (name, size, file_id) so
+# Streamlit reruns skip re-reading and re-hashing an unchanged upload
+_file_hash_cache = {}
+
 def get_file_hash(uploaded_file):
     """
     Generate a hash for a file to track changes
-    
+
     Args:
         uploaded_file: The uploaded file object
-        
+
     Returns:
         str: Hash of the file content
     """
-    content = uploaded_file.getvalue()
-    file_hash = hashlib.md5(content).hexdigest()
+    # Streamlit reruns the script on every widget interaction, so this is
+    # called far more often than uploads actually change; the fingerprint
+    # lookup makes repeat calls O(1) instead of rehashing multi-MB content
+    cache_key = (
+        getattr(uploaded_file, "name", None),
+        getattr(uploaded_file, "size", None),
+        getattr(uploaded_file, "file_id", None)
+    )
+    cacheable = cache_key[0] is not None
+    if cacheable and cache_key in _file_hash_cache:
+        return _file_hash_cache[cache_key]
+
+    # BLAKE2b is considerably faster than MD5 on modern CPUs and this is
+    # change tracking, not security; a 16-byte digest is plenty.
+    # getbuffer() hands the hash a zero-copy view into the upload's
+    # buffer, where getvalue() would duplicate the whole file in memory
+    content = uploaded_file.getbuffer()
+    file_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    if cacheable:
+        # Keep the cache bounded; a session rarely sees more than a few files
+        if len(_file_hash_cache) >= 64:
+            _file_hash_cache.clear()
+        _file_hash_cache[cache_key] = file_hash
     return file_hash
 
 def is_extraction_attempt(question):
@@ -27,16 +119,7 @@ def is_extraction_attempt(question):
     Returns:
         bool: True if question seems to be an extraction attempt
     """
-    extraction_patterns = [
-        r"extract\s+(?:all|complete|entire|full|whole)",
-        r"(?:show|give|provide)\s+(?:me|us)?\s+(?:all|complete|entire|full|whole)",
-        r"(?:copy|paste)\s+(?:all|complete|entire|full|whole)",
-        r"(?:next|previous|following|remaining|rest)\s+(?:part|section|text|content)",
-        r"continue\s+(?:from|where\s+you\s+left\s+off)",
-        r"what\s+(?:is|are|comes)\s+(?:after|before)"
-    ]
-    
-    return any(re.search(pattern, question.lower()) for pattern in extraction_patterns)
+    return _battery_match(_EXTRACTION_DB, _EXTRACTION_RE, question)
 
 def is_consecutive_query(current_query, query_history, similarity_threshold=0.7):
     """
@@ -53,20 +136,11 @@ def is_consecutive_query(current_query, query_history, similarity_threshold=0.7)
     if not query_history:
         return False
     
-    # Check for sequential patterns
-    sequential_patterns = [
-        r"continue",
-        r"next",
-        r"more",
-        r"go on",
-        r"proceed",
-        r"then",
-        r"after",
-        r"following"
-    ]
-    
-    # Check if current query contains sequential patterns
-    is_sequential = any(re.search(pattern, current_query.lower()) for pattern in sequential_patterns)
+    # Check if current query contains sequential words; every pattern is a
+    # plain literal, so one lowercase copy plus substring scans settles it
+    # several times faster than regex searches
+    query_lower = current_query.lower()
+    is_sequential = any(word in query_lower for word in _SEQUENTIAL_WORDS)
     
     # If sequential patterns found, this might be an extraction attempt
     return is_sequential
@@ -95,13 +169,10 @@ def truncate_text_to_tokens(text, max_tokens=1000):
     Returns:
         str: Truncated text
     """
-    # Approximate tokens
-    if count_tokens(text) <= max_tokens:
-        return text
-    
-    # Otherwise truncate to approximate character count
+    # Same ~4 chars/token approximation as count_tokens, inlined to a
+    # single len() comparison since this runs on every generated response
     char_limit = max_tokens * 4
-    return text[:char_limit] + "..."
+    return text if len(text) <= char_limit else text[:char_limit] + "..."
 
 def extract_table_from_text(text):
     """
@@ -113,37 +184,26 @@ def extract_table_from_text(text):
     Returns:
         pandas.DataFrame or None: Extracted table if successful
     """
-    # Look for common table patterns
-    lines = text.strip().split('\n')
-    
-    # Check if text has pipe-separated table format
-    if any('|' in line for line in lines):
-        pipe_rows = [line for line in lines if '|' in line]
-        
-        # Clean up rows and split by pipes
-        cleaned_rows = []
-        for row in pipe_rows:
-            cells = [cell.strip() for cell in row.split('|')]
-            # Remove empty cells at the start and end (from leading/trailing pipes)
-            if cells and not cells[0]:
-                cells = cells[1:]
-            if cells and not cells[-1]:
-                cells = cells[:-1]
-            if cells:
-                cleaned_rows.append(cells)
-        
-        # Check if we have enough rows and consistent number of columns
-        if len(cleaned_rows) >= 2:
-            # Check if second row looks like a separator (----)
-            if all(cell.strip().startswith('-') for cell in cleaned_rows[1]):
-                # This is a markdown table, skip the separator row
-                headers = cleaned_rows[0]
-                data = cleaned_rows[2:]
-                return pd.DataFrame(data, columns=headers)
-            else:
-                # Just a regular pipe-delimited table
-                headers = cleaned_rows[0]
-                data = cleaned_rows[1:]
-                return pd.DataFrame(data, columns=headers)
-    
+    # Look for common table patterns: a single pass over the lines filters
+    # for pipes and cleans each row as it goes, rather than separate
+    # detect / filter / clean traversals. Stripping the pipes off the row
+    # string before splitting replaces the old cells[1:] / cells[:-1]
+    # slice pair, so each row is parsed with no intermediate lists.
+    # map(str.strip, ...) strips the cells in the C layer without a Python
+    # frame per cell
+    cleaned_rows = [
+        list(map(str.strip, row.strip().strip('|').split('|')))
+        for row in text.strip().split('\n') if '|' in row
+    ]
+
+    # Check if we have enough rows and consistent number of columns
+    if len(cleaned_rows) >= 2:
+        # Check if second row looks like a separator (----)
+        if all(cell.startswith('-') for cell in cleaned_rows[1]):
+            # This is a markdown table, skip the separator row
+            return pd.DataFrame(cleaned_rows[2:], columns=cleaned_rows[0])
+        else:
+            # Just a regular pipe-delimited table
+            return pd.DataFrame(cleaned_rows[1:], columns=cleaned_rows[0])
+
     return None